@@ -1,11 +1,130 @@
 # archive_handler.py
 import os
+import re
+import fnmatch
 import hashlib
+import logging
+from collections import defaultdict
+from datetime import datetime
+from operator import itemgetter
+
+DEFAULT_IGNORE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.ftpignore')
+
 
 class ArchiveHandler:
+    # Метка времени создания в имени архива: '..._YYYYMMDD_HHMMSS_...' или '..._YYYYMMDD_HHMMSS.tar'
+    _TS_RE = re.compile(r'_(\d{4})(\d{2})(\d{2})_(\d{2})(\d{2})(\d{2})[_.]')
+
+    def __init__(self, logger=None, ignore_file=DEFAULT_IGNORE_FILE):
+        self.logger = logger or logging.getLogger(self.__class__.__name__)
+        self._ignore_re = None
+        self._ignore_substrings = ()
+        self._load_ignore_patterns(ignore_file)
+
+    def _load_ignore_patterns(self, ignore_file):
+        """
+        Загружает шаблоны из .ftpignore.
+        Glob-шаблоны компилируются в одно регулярное выражение,
+        шаблоны без спецсимволов проверяются как подстроки имени.
+        """
+        if not ignore_file or not os.path.isfile(ignore_file):
+            return
+
+        glob_patterns = []
+        substrings = []
+        with open(ignore_file, encoding='utf-8') as f:
+            for line in f:
+                pattern = line.strip().rstrip('/')  # 'dir/' означает каталог с таким именем
+                if not pattern or pattern.startswith('#'):
+                    continue
+                if any(c in pattern for c in '*?['):
+                    glob_patterns.append(pattern)
+                else:
+                    substrings.append(pattern)
+
+        if glob_patterns:
+            self._ignore_re = re.compile('|'.join(fnmatch.translate(p) for p in glob_patterns))
+        self._ignore_substrings = tuple(substrings)
+        self.logger.debug(f"Загружено {len(glob_patterns) + len(substrings)} шаблонов из {ignore_file}")
+
+    def _should_ignore(self, filename):
+        """Проверяет, подпадает ли имя файла под шаблоны .ftpignore."""
+        if self._ignore_re is not None and self._ignore_re.match(filename):
+            return True
+        return any(s in filename for s in self._ignore_substrings)
+
     @staticmethod
-    def find_archives(path, ext='.tar'):
-        return [f for f in os.listdir(path) if f.endswith(ext)]
+    def parse_archive_name(name, ext='.tar'):
+        """
+        Разбирает имя архива или его тома ('<base>.tar' или '<base>.tar.N') за один проход.
+
+        Returns:
+            tuple: (базовое имя '<base>.tar', номер тома) или (None, 0), если это не архив.
+        """
+        head, sep, tail = name.rpartition(ext)
+        if not sep or not head:
+            return None, 0
+        if not tail:
+            return name, 0
+        # isdecimal(), а не isdigit(): int() не принимает, например, '²'
+        if tail[0] == '.' and tail[1:].isdecimal():
+            return head + sep, int(tail[1:])
+        return None, 0
+
+    @classmethod
+    def archive_timestamp(cls, name):
+        """
+        Извлекает из имени архива дату создания.
+
+        Returns:
+            datetime | None: Дата создания или None, если метки времени в имени нет.
+        """
+        m = cls._TS_RE.search(name)
+        if not m:
+            return None
+        try:
+            return datetime(*map(int, m.groups()))
+        except ValueError:
+            return None
+
+    def group_archives(self, path, ext='.tar'):
+        """
+        Группирует архивы (включая многотомные '<name>.tar.N') по базовому имени
+        за один проход по директории. Размер берется из stat() того же DirEntry.
+
+        Returns:
+            dict: {базовое имя: [(имя тома, размер в байтах) в порядке номеров]}.
+        """
+        groups = defaultdict(list)
+        with os.scandir(path) as entries:
+            for entry in entries:
+                name = entry.name
+                if self._should_ignore(name):
+                    continue
+                base, volume = self.parse_archive_name(name, ext)
+                # is_file() берет тип из записи каталога и обычно обходится без stat()
+                if base is not None and entry.is_file():
+                    try:
+                        size = entry.stat().st_size
+                    except FileNotFoundError:
+                        # Файл удален после чтения каталога
+                        continue
+                    groups[base].append((volume, name, size))
+
+        for base, volumes in groups.items():
+            volumes.sort(key=itemgetter(0))
+            groups[base] = [(name, size) for _, name, size in volumes]
+        return dict(groups)
+
+    def find_archives(self, path, ext='.tar'):
+        """
+        Возвращает все архивы и их тома, упорядоченные по архиву и номеру тома.
+
+        Returns:
+            dict: {имя файла: размер в байтах}.
+        """
+        groups = self.group_archives(path, ext)
+        return {name: size for base in sorted(groups) for name, size in groups[base]}
 
     @staticmethod
     def file_hash(filepath):
@@ -13,4 +132,4 @@ class ArchiveHandler:
         with open(filepath, 'rb') as f:
             for chunk in iter(lambda: f.read(4096), b""):
                 hasher.update(chunk)
-        return hasher.hexdigest()
\ No newline at end of file
+        return hasher.hexdigest()
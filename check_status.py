@@ -25,7 +25,12 @@ logger = logging.getLogger('self_check')
 
 
 def check_config(config_path):
-    """Проверяет наличие и корректность конфигурационного файла."""
+    """
+    Проверяет наличие и корректность конфигурационного файла.
+
+    Returns:
+        Config | None: Загруженная конфигурация для дальнейших проверок или None при ошибке.
+    """
     logger.info("1. Проверка конфигурации...")
     try:
         config = Config(config_path)
@@ -48,21 +53,21 @@ def check_config(config_path):
             if not real_value:
                 logger.error(f"ОШИБКА: {name} не задан в конфигурации.",
                              extra={"error_code": BackupErrorCodes.CONFIG_MISSING})
-                return False
+                return None
             else:
                 logger.info(f"✅ {name}: {display_value}")
 
         logger.info("✅ Конфигурация в порядке.")
-        return True
+        return config
 
     except FileNotFoundError:
         logger.error(f"ОШИБКА: Конфигурационный файл '{config_path}' не найден.",
                      extra={"error_code": BackupErrorCodes.CONFIG_MISSING})
-        return False
+        return None
     except Exception as e:
         logger.error(f"ОШИБКА: Не удалось прочитать конфигурацию: {e}",
                      extra={"error_code": BackupErrorCodes.CONFIG_VALUE_ERROR})
-        return False
+        return None
 
 
 def check_local_paths(config):
@@ -141,13 +146,11 @@ def main():
     logger.info("=== ЗАПУСК SELF-CHECK ===")
 
     # Последовательная проверка всех компонентов
-    config_ok = check_config(args.config)
-    if not config_ok:
+    # Если конфиг ок, тот же объект используется для дальнейших проверок
+    config = check_config(args.config)
+    if config is None:
         sys.exit(1)  # Критическая ошибка, выходим
 
-    # Если конфиг ок, создаем объект для дальнейших проверок
-    config = Config(args.config)
-
     local_ok = check_local_paths(config)
     if not local_ok:
         sys.exit(1)
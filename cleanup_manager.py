@@ -1,7 +1,11 @@
 # cleanup_manager.py
 import os
+import heapq
 import logging
+from collections import defaultdict
+from datetime import datetime, timezone
 from .errors import BackupErrorCodes
+from .archive_handler import ArchiveHandler
 
 
 class CleanupManager:
@@ -9,26 +13,147 @@ class CleanupManager:
         self.logger = logger or logging.getLogger(self.__class__.__name__)
 
     def cleanup_local(self, path, max_copies):
-        """Удаляет старые локальные резервные копии."""
-        if not os.path.isdir(path):
+        """
+        Удаляет старые локальные резервные копии.
+        Копией считается архив вместе со всеми его томами.
+        """
+        # Отдельная проверка os.path.isdir() не нужна: об отсутствии папки сообщит сам scandir()
+        try:
+            entries = os.scandir(path)
+        except (FileNotFoundError, NotADirectoryError):
             self.logger.error(f"Локальная папка для очистки не найдена: {path}",
                               extra={"error_code": BackupErrorCodes.LOCAL_DIR_NOT_FOUND})
             return
+        except OSError as e:
+            self.logger.error(f"Ошибка при локальной очистке: {e}", exc_info=True)
+            return
 
         try:
-            files = sorted(
-                os.listdir(path),
-                key=lambda x: os.path.getmtime(os.path.join(path, x))
-            )
-            if len(files) <= max_copies:
-                self.logger.debug(f"Локальная очистка не требуется. Копий: {len(files)}, лимит: {max_copies}")
+            # Один проход по директории: тома группируются по архивам,
+            # а stat() берется у DirEntry — не больше одного системного вызова на файл.
+            # Архив датируется самым свежим из его томов, дата считается тут же
+            archive_sets = defaultdict(list)
+            newest = {}
+            with entries:
+                for entry in entries:
+                    base, _ = ArchiveHandler.parse_archive_name(entry.name)
+                    # is_file() берет тип из записи каталога и обычно обходится без stat()
+                    if base is not None and entry.is_file():
+                        st = entry.stat()
+                        archive_sets[base].append((entry.name, st.st_size))
+                        newest[base] = max(newest.get(base, st.st_mtime), st.st_mtime)
+
+            # Сколько копий удалить, считаем один раз
+            total = len(archive_sets)
+            trim = max(0, total - max(0, max_copies))
+            if not trim:
+                self.logger.debug(f"Локальная очистка не требуется. Копий: {total}, лимит: {max_copies}")
                 return
 
-            for f in files[:-max_copies]:
-                file_path = os.path.join(path, f)
-                os.remove(file_path)
-                self.logger.info(f"Удален локальный файл: {file_path}", extra={"deleted_file": f})
-            self.logger.info(f"Локальная очистка завершена. Осталось копий: {max_copies}")
+            # Полная сортировка не нужна: выбираем только самые старые копии.
+            # Ошибка удаления одного файла не прерывает очистку остальных
+            removed = 0
+            for base in heapq.nsmallest(trim, newest, key=newest.get):
+                complete = True
+                for f, size in archive_sets[base]:
+                    file_path = os.path.join(path, f)
+                    try:
+                        os.remove(file_path)
+                    except OSError as e:
+                        complete = False
+                        self.logger.error(f"Не удалось удалить локальный файл {file_path}: {e}")
+                        continue
+                    self.logger.info(f"Удален локальный файл: {file_path} ({size / 1024 / 1024:.1f} МБ)",
+                                     extra={"deleted_file": f, "size": size})
+                removed += complete
+            self.logger.info(f"Локальная очистка завершена. Осталось копий: {total - removed}")
+
+        except Exception as e:
+            self.logger.error(f"Ошибка при локальной очистке: {e}", exc_info=True)
+
+    @staticmethod
+    def _remote_timestamp(name, facts):
+        """
+        Дата архива на сервере (в UTC): из имени, иначе из атрибута modify (YYYYMMDDHHMMSS[.sss]).
+        Метка в имени записана в местном времени, а modify по RFC 3659 — в UTC,
+        поэтому дата из имени переводится в UTC, чтобы их можно было сравнивать.
+        Архив без даты считается самым новым, чтобы его нельзя было удалить как старый;
+        если даты нет ни у одного архива, они упорядочиваются по имени.
+        """
+        timestamp = ArchiveHandler.archive_timestamp(name)
+        if timestamp:
+            try:
+                # astimezone() считает дату без часового пояса местной
+                return timestamp.astimezone(timezone.utc)
+            except (OverflowError, OSError, ValueError):
+                # Дата у границ диапазона datetime: переходим к modify
+                pass
+        modify = facts.get('modify', '')
+        try:
+            return datetime(int(modify[0:4]), int(modify[4:6]), int(modify[6:8]),
+                            int(modify[8:10]), int(modify[10:12]), int(modify[12:14]),
+                            tzinfo=timezone.utc)
+        except ValueError:
+            return datetime.max.replace(tzinfo=timezone.utc)
+
+    def cleanup_remote(self, ftp_client, remote_dir, max_copies, remote_files=None):
+        """
+        Удаляет старые резервные копии на FTP-сервере.
+        Копией считается архив вместе со всеми его томами.
+
+        Args:
+            ftp_client (FTPClient): Подключенный FTP-клиент.
+            remote_dir (str): Директория с бэкапами на сервере.
+            max_copies (int): Сколько копий оставить.
+            remote_files (dict, optional): Уже полученный список файлов на сервере с атрибутами
+                (например, SyncManager.remote_files). Если не передан, список запрашивается.
+                Удаленные файлы убираются из этого словаря.
+        """
+        try:
+            if remote_files is None:
+                remote_files = ftp_client.list_files_with_facts(remote_dir)
+
+            # Группируем тома по архивам за один проход; прочие файлы на сервере не трогаем
+            archive_sets = defaultdict(list)
+            for name in remote_files:
+                base, _ = ArchiveHandler.parse_archive_name(name)
+                if base is not None:
+                    archive_sets[base].append(name)
+
+            # Сколько копий удалить, считаем один раз
+            total = len(archive_sets)
+            trim = max(0, total - max(0, max_copies))
+            if not trim:
+                self.logger.debug(f"Удаленная очистка не требуется. Копий: {total}, лимит: {max_copies}")
+                return
+
+            # Дату определяем один раз на архив: из имени, при ее отсутствии —
+            # по дате изменения первого тома на сервере (MLSD); при равенстве — по имени.
+            # Сортировать все копии не нужно: выбираем только самые старые
+            expired = heapq.nsmallest(
+                trim,
+                archive_sets,
+                key=lambda base: (self._remote_timestamp(base, remote_files[min(archive_sets[base])]), base)
+            )
+
+            to_delete = {
+                os.path.join(remote_dir, f): f
+                for base in expired
+                for f in archive_sets[base]
+            }
+            deleted = ftp_client.delete_files(list(to_delete))
+            for remote_path in deleted:
+                f = to_delete[remote_path]
+                remote_files.pop(f, None)
+                self.logger.info(f"Удален файл на сервере: {remote_path}", extra={"deleted_file": f})
+
+            # Копия удалена, только если сервер подтвердил удаление всех ее томов
+            deleted = set(deleted)
+            removed = sum(
+                all(os.path.join(remote_dir, f) in deleted for f in archive_sets[base])
+                for base in expired
+            )
+            self.logger.info(f"Удаленная очистка завершена. Осталось копий: {total - removed}")
 
         except Exception as e:
-            self.logger.error(f"Ошибка при локальной очистке: {e}", exc_info=True)
\ No newline at end of file
+            self.logger.error(f"Ошибка при удаленной очистке: {e}", exc_info=True)
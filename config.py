@@ -3,12 +3,36 @@ import configparser
 from dotenv import load_dotenv
 from cryptography.fernet import Fernet
 
+# Кэш разобранных конфигурационных файлов: {абсолютный путь: (mtime_ns, ConfigParser)}
+_CONFIG_CACHE = {}
+
+
+def _load_parser(config_path):
+    """
+    Возвращает разобранный конфигурационный файл.
+    Повторно файл читается только если изменилось время его модификации.
+    """
+    try:
+        mtime = os.stat(config_path).st_mtime_ns
+    except OSError:
+        # Как и ConfigParser.read(), отсутствие файла не считаем ошибкой
+        return configparser.ConfigParser()
+
+    key = os.path.abspath(config_path)
+    cached = _CONFIG_CACHE.get(key)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    parser = configparser.ConfigParser()
+    parser.read(config_path)
+    _CONFIG_CACHE[key] = (mtime, parser)
+    return parser
+
 
 class Config:
     def __init__(self, config_path='config.ini'):
         load_dotenv()
-        self.parser = configparser.ConfigParser()
-        self.parser.read(config_path)
+        self.parser = _load_parser(config_path)
         self.encryption_key = os.getenv('ENCRYPTION_KEY')
         self.fernet = Fernet(self.encryption_key.encode()) if self.encryption_key else None
 
@@ -83,6 +107,26 @@ class Config:
             raise ValueError("Не указано количество удалённых копий (MAX_REMOTE_COPIES или [Cleanup] max_remote_copies)")
         return int(val)
 
+    @property
+    def parallel_uploads(self):
+        val = self._get_value('PARALLEL_UPLOADS', 'Sync', 'parallel_uploads', default=4)
+        return max(1, int(val))
+
+    @property
+    def parallel_chunks(self):
+        val = self._get_value('PARALLEL_CHUNKS', 'Sync', 'parallel_chunks', default=1)
+        return max(1, int(val))
+
+    @property
+    def chunk_upload_threshold_mb(self):
+        val = self._get_value('CHUNK_UPLOAD_THRESHOLD_MB', 'Sync', 'chunk_upload_threshold_mb', default=512)
+        return int(val)
+
     @property
     def log_dir(self):
-        return self._get_value('LOG_DIR', 'Logging', 'log_dir')
\ No newline at end of file
+        return self._get_value('LOG_DIR', 'Logging', 'log_dir')
+
+    @property
+    def log_gzip_level(self):
+        val = self._get_value('LOG_GZIP_LEVEL', 'Logging', 'gzip_level', default=1)
+        return min(9, max(1, int(val)))
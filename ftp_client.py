@@ -1,13 +1,63 @@
 # ftp_client.py
 import ftplib
+import hashlib
 import logging
+import os
 import socket
+import zlib
+from concurrent.futures import ThreadPoolExecutor, wait
 from contextlib import suppress
 from .errors import BackupErrorCodes
 from .utils import retry
 
+try:
+    from ssl import SSLSocket as _SSLSocket
+except ImportError:
+    _SSLSocket = None
+
+# Размер блока передачи данных (вместо 8 КиБ по умолчанию в ftplib)
+UPLOAD_BLOCK_SIZE = 1 << 20
+
+# Сколько команд DELE отправлять пакетом перед чтением ответов
+DELETE_BATCH_SIZE = 50
+
+# Нижняя оценка скорости, с которой сервер считает контрольную сумму файла (байт/с).
+# Сервер отвечает на HASH/XCRC только после чтения всего файла,
+# поэтому ожидание ответа растет вместе с размером файла
+CHECKSUM_MIN_RATE = 10 * 1024 * 1024
+
+# Как часто отправлять NOOP по простаивающему управляющему соединению (секунды).
+# vsftpd по умолчанию закрывает сессию после 300 секунд бездействия
+KEEPALIVE_INTERVAL = 60
+
+
+class _Crc32:
+    """Инкрементальный CRC32 с интерфейсом, как у объектов hashlib."""
+
+    def __init__(self):
+        self.value = 0
+
+    def update(self, data):
+        self.value = zlib.crc32(data, self.value)
+
+    def hexdigest(self):
+        return f'{self.value:08x}'
+
+
+# Алгоритмы команды HASH (draft-bryan-ftpext-hash), которые можно посчитать локально,
+# в порядке возрастания стоимости вычисления на сервере
+_HASH_ALGORITHMS = {
+    'CRC32': _Crc32,
+    'MD5': hashlib.md5,
+    'SHA-1': hashlib.sha1,
+    'SHA-256': hashlib.sha256,
+    'SHA-512': hashlib.sha512,
+}
+
+
 class FTPClient:
-    def __init__(self, host, user, password, timeout=30, logger=None):
+    def __init__(self, host, user, password, timeout=30, logger=None,
+                 parallel_chunks=1, chunk_threshold=0):
         self.host = host
         self.user = user
         self.password = password
@@ -15,12 +65,30 @@ class FTPClient:
         self.logger = logger or logging.getLogger(self.__class__.__name__)
         self.ftp = None
 
+        # Параметры загрузки крупных файлов несколькими частями (REST + STOR).
+        # parallel_chunks=1 отключает эту возможность.
+        self.parallel_chunks = parallel_chunks
+        self.chunk_threshold = chunk_threshold
+
+        # Буфер загрузки, переиспользуемый между файлами этого соединения
+        self._upload_buf = None
+
+        # Расширения, объявленные сервером в ответе на FEAT: {'XCRC': '', 'MLST': 'size*;modify*;', ...}
+        self.features = {}
+        # Способ проверки контрольной суммы после загрузки: (команда, фабрика хешера) или None
+        self._checksum = None
+        # Установлен ли на сервере двоичный режим передачи (TYPE I)
+        self._binary_mode = False
+
     def connect(self):
         """Устанавливает соединение с FTP-сервером."""
         try:
             self.logger.info(f"Попытка подключения к {self.host}")
             self.ftp = ftplib.FTP(self.host, timeout=self.timeout)
+            self._binary_mode = False
             self.ftp.login(self.user, self.password)
+            self.features = self._probe_features()
+            self._checksum = self._select_checksum()
             self.logger.info(f"Успешно подключено к {self.host}")
             return True
         except ftplib.all_errors as e:
@@ -31,6 +99,51 @@ class FTPClient:
             self.close() # Убедимся, что соединение закрыто при ошибке
             return False
 
+    def _probe_features(self):
+        """Запрашивает у сервера список поддерживаемых расширений (FEAT)."""
+        try:
+            resp = self.ftp.sendcmd('FEAT')
+        except ftplib.Error:
+            return {}
+
+        features = {}
+        # Первая и последняя строки ответа служебные ('211-Features:' и '211 End')
+        for line in resp.splitlines()[1:-1]:
+            name, _, args = line.strip().partition(' ')
+            if name:
+                features[name.upper()] = args
+        self.logger.debug(f"Расширения сервера {self.host}: {', '.join(features) or 'нет'}")
+        return features
+
+    def _select_checksum(self):
+        """
+        Выбирает команду проверки контрольной суммы по расширениям сервера.
+        Сервер читает для нее весь файл, поэтому берется самый дешевый из доступных
+        алгоритмов: CRC32 (HASH или XCRC), затем MD5, SHA-1 и т. д. Если это не алгоритм
+        сервера по умолчанию (отмечен '*' в FEAT), он включается командой OPTS HASH.
+        """
+        hash_algorithms = {}
+        for algorithm in self.features.get('HASH', '').split(';'):
+            name = algorithm.rstrip('*').upper()
+            if name in _HASH_ALGORITHMS:
+                hash_algorithms[name] = algorithm.endswith('*')
+
+        for name, factory in _HASH_ALGORITHMS.items():
+            if name in hash_algorithms and (hash_algorithms[name] or self._set_hash_algorithm(name)):
+                return 'HASH', factory
+            if name == 'CRC32' and 'XCRC' in self.features:
+                return 'XCRC', _Crc32
+        return None
+
+    def _set_hash_algorithm(self, name):
+        """Переключает алгоритм команды HASH для текущего соединения."""
+        try:
+            self.ftp.sendcmd(f'OPTS HASH {name}')
+            return True
+        except ftplib.Error as e:
+            self.logger.debug(f"Сервер не переключил HASH на {name}: {e}")
+            return False
+
     # --- НОВЫЙ МЕТОД: close ---
     def close(self):
         """
@@ -44,6 +157,38 @@ class FTPClient:
             self.ftp = None
     # --------------------------------
 
+    def _reset_connection(self):
+        """
+        Закрывает соединение, в котором мог остаться непрочитанный ответ сервера
+        (например, после таймаута). QUIT не отправляется: его ответ был бы перепутан
+        с запоздавшим. Новое соединение откроет _ensure_connected().
+        """
+        if self.ftp:
+            self.logger.debug(f"Сброс соединения с {self.host}")
+            with suppress(Exception):
+                self.ftp.close()
+            self.ftp = None
+
+    def _ensure_connected(self):
+        """Переподключается, если соединение было сброшено."""
+        if self.ftp is None and not self.connect():
+            raise ConnectionError(f"Не удалось подключиться к {self.host}")
+
+    def clone(self):
+        """
+        Создает новый (еще не подключенный) клиент с теми же параметрами.
+        Используется для открытия отдельного соединения на каждый поток загрузки.
+        """
+        return FTPClient(
+            host=self.host,
+            user=self.user,
+            password=self.password,
+            timeout=self.timeout,
+            logger=self.logger,
+            parallel_chunks=self.parallel_chunks,
+            chunk_threshold=self.chunk_threshold
+        )
+
     # --- НОВЫЕ МЕТОДЫ: Контекстный менеджер ---
     def __enter__(self):
         """Вход в контекстный менеджер. Пробует установить соединение."""
@@ -67,6 +212,7 @@ class FTPClient:
     def list_files(self, remote_dir):
         """Получает список файлов на сервере."""
         self.logger.debug(f"Запрос списка файлов в '{remote_dir}'")
+        self._binary_mode = False  # NLST переключает соединение в TYPE A
         files = self.ftp.nlst(remote_dir)
         self.logger.debug(f"Получено {len(files)} файлов")
         return files
@@ -75,17 +221,277 @@ class FTPClient:
         max_retries=5,
         initial_delay=2,
         backoff_factor=2.5,
-        exceptions=(ftplib.all_errors, OSError),
+        exceptions=(ftplib.all_errors, socket.timeout, ConnectionResetError),
         logger=None
     )
+    def list_files_with_facts(self, remote_dir):
+        """
+        Получает файлы на сервере вместе с их атрибутами.
+        Если сервер поддерживает MLSD, одним запросом возвращаются имена, размеры
+        и даты изменения; иначе используется NLST и атрибуты остаются пустыми.
+
+        Returns:
+            dict: {имя файла: {'size': '123', 'modify': '20260101030000', ...}}.
+        """
+        self.logger.debug(f"Запрос списка файлов в '{remote_dir}'")
+        self._binary_mode = False  # MLSD и NLST переключают соединение в TYPE A
+        if 'MLST' in self.features:
+            try:
+                files = {
+                    os.path.basename(name): facts
+                    for name, facts in self.ftp.mlsd(remote_dir, facts=['type', 'size', 'modify'])
+                    if facts.get('type', 'file') == 'file'
+                }
+                self.logger.debug(f"Получено {len(files)} файлов (MLSD)")
+                return files
+            except ftplib.error_perm as e:
+                self.logger.debug(f"MLSD недоступен ({e}), использую NLST")
+
+        files = {os.path.basename(name): {} for name in self.ftp.nlst(remote_dir)}
+        self.logger.debug(f"Получено {len(files)} файлов")
+        return files
+
     def upload_file(self, local_path, remote_path):
-        """Загружает файл на сервер."""
+        """
+        Загружает файл на сервер.
+        Крупные файлы (если включено) загружаются параллельными частями,
+        при любой ошибке этого режима выполняется обычная загрузка одним потоком.
+        """
+        size = os.path.getsize(local_path)
+        if self.parallel_chunks > 1 and size and size >= self.chunk_threshold:
+            try:
+                if self._upload_file_in_parts(local_path, remote_path, size):
+                    return True
+            except ftplib.all_errors as e:
+                self.logger.warning(f"Параллельная загрузка {local_path} не удалась: {e}. "
+                                    f"Переход на загрузку одним потоком.")
+                # Состояние основного соединения неизвестно: загрузка одним потоком откроет новое
+                self._reset_connection()
+        return self._upload_file_single(local_path, remote_path)
+
+    @retry(
+        max_retries=5,
+        initial_delay=2,
+        backoff_factor=2.5,
+        exceptions=(ftplib.all_errors, OSError),
+        logger=None
+    )
+    def _upload_file_single(self, local_path, remote_path):
+        """
+        Загружает файл на сервер одним потоком и проверяет результат.
+        Если сервер поддерживает HASH или XCRC, контрольная сумма считается
+        по передаваемым данным и сравнивается с серверной, иначе сравнивается размер.
+        """
         self.logger.info(f"Начало загрузки {local_path} -> {remote_path}")
+        # Повторная попытка после обрыва выполняется через новое соединение
+        self._ensure_connected()
+        hasher = self._checksum[1]() if self._checksum else None
+        try:
+            with open(local_path, 'rb') as f:
+                sent = self._store_file(remote_path, f, hasher=hasher)
+            verified = self._verify_upload(remote_path, sent, hasher)
+        except (OSError, EOFError):
+            self._reset_connection()
+            raise
+        if not verified:
+            # OSError обрабатывается декоратором retry: файл будет загружен заново
+            raise OSError(f"Проверка целостности {remote_path} не пройдена")
+        self.logger.info(f"Успешная загрузка {local_path}")
+        return True
+
+    def _verify_upload(self, remote_path, expected_size, hasher=None):
+        """
+        Сверяет загруженный файл с переданными данными:
+        по контрольной сумме (HASH или XCRC), если она посчитана, иначе по размеру (SIZE).
+        Если сервер не поддерживает ни одну из команд, проверка пропускается.
+
+        Returns:
+            bool: False, если обнаружено расхождение.
+        """
+        if hasher is not None:
+            command = self._checksum[0]
+            sock = self.ftp.sock
+            try:
+                sock.settimeout(max(self.timeout, expected_size / CHECKSUM_MIN_RATE))
+                try:
+                    resp = self.ftp.sendcmd(f'{command} {remote_path}')
+                finally:
+                    sock.settimeout(self.timeout)
+                # HASH: '213 SHA-256 0-1234 <hex> <имя>', XCRC: '250 <hex>'
+                remote_digest = resp.split()[3] if command == 'HASH' else resp.split()[-1]
+                if int(remote_digest, 16) == int(hasher.hexdigest(), 16):
+                    return True
+                self.logger.error(f"Контрольная сумма {remote_path} на сервере ({remote_digest}) не совпадает "
+                                  f"с локальной ({hasher.hexdigest()})",
+                                  extra={"error_code": BackupErrorCodes.SYNC_INTEGRITY_CHECK_FAILED})
+                return False
+            except (ftplib.Error, ValueError, IndexError) as e:
+                self.logger.debug(f"{command} для {remote_path} недоступен ({e}), проверяю размер")
+            except (OSError, EOFError) as e:
+                # Ответ может прийти позже и сбить разбор следующих команд,
+                # поэтому размер проверяем уже через новое соединение
+                self.logger.warning(f"{command} для {remote_path} не ответил ({e}), "
+                                    f"переподключаюсь и проверяю размер")
+                self._reset_connection()
+                self._ensure_connected()
+
+        try:
+            remote_size = self.ftp.size(remote_path)
+        except ftplib.error_perm as e:
+            self.logger.debug(f"SIZE для {remote_path} недоступен ({e}), проверка пропущена")
+            return True
+        if remote_size != expected_size:
+            self.logger.error(f"Размер {remote_path} на сервере ({remote_size}) не совпадает "
+                              f"с переданным ({expected_size})",
+                              extra={"error_code": BackupErrorCodes.SYNC_INTEGRITY_CHECK_FAILED})
+            return False
+        return True
+
+    def _store_file(self, remote_path, f, rest=None, count=None, hasher=None):
+        """
+        Аналог ftplib.FTP.storbinary.
+        Данные файла передаются в сокет ядром через sendfile(2), без копирования
+        в пространство пользователя. Для TLS-соединений, где sendfile невозможен,
+        и когда нужна контрольная сумма, используется передача блоками
+        через переиспользуемый буфер.
+
+        Args:
+            remote_path (str): Путь к файлу на сервере.
+            f: Открытый в бинарном режиме файл, позиционированный на начало данных.
+            rest (int, optional): Смещение в удаленном файле (команда REST).
+            count (int, optional): Сколько байт передать (по умолчанию — до конца файла).
+            hasher (optional): Объект с методом update(), получающий каждый переданный блок.
+
+        Returns:
+            int: Количество переданных байт.
+        """
+        self._ensure_binary_mode()
+        with self.ftp.transfercmd(f'STOR {remote_path}', rest) as conn:
+            is_tls = _SSLSocket is not None and isinstance(conn, _SSLSocket)
+            if is_tls or hasher is not None:
+                sent = self._send_buffered(conn, f, count, hasher)
+            else:
+                sent = conn.sendfile(f, f.tell(), count)
+            if is_tls:
+                conn.unwrap()
+        self.ftp.voidresp()
+        return sent
+
+    def _ensure_binary_mode(self):
+        """
+        Переключает соединение в двоичный режим (TYPE I), только если это еще не сделано.
+        В отличие от storbinary, команда не отправляется перед каждым файлом.
+        """
+        if not self._binary_mode:
+            self.ftp.voidcmd('TYPE I')
+            self._binary_mode = True
+
+    def _send_buffered(self, conn, f, count=None, hasher=None):
+        """
+        Передает данные блоками UPLOAD_BLOCK_SIZE.
+        Данные читаются через readinto() в переиспользуемый буфер,
+        поэтому на каждый блок не создается новый объект bytes.
+
+        Returns:
+            int: Количество переданных байт.
+        """
+        if self._upload_buf is None:
+            self._upload_buf = bytearray(UPLOAD_BLOCK_SIZE)
+        view = memoryview(self._upload_buf)
+
+        sent = 0
+        remaining = count
+        while remaining is None or remaining > 0:
+            size = UPLOAD_BLOCK_SIZE if remaining is None else min(UPLOAD_BLOCK_SIZE, remaining)
+            n = f.readinto(view[:size])
+            if not n:
+                break
+            block = view[:n]
+            conn.sendall(block)
+            if hasher is not None:
+                hasher.update(block)
+            sent += n
+            if remaining is not None:
+                remaining -= n
+        return sent
+
+    def _upload_file_in_parts(self, local_path, remote_path, size):
+        """
+        Загружает файл несколькими частями параллельно.
+        Каждая часть пишется в тот же удаленный файл со своего смещения (REST + STOR)
+        через отдельное соединение. Требует поддержки REST для STOR на сервере.
+
+        Returns:
+            bool: True, если файл на сервере совпал с локальным
+                (по контрольной сумме, если сервер ее поддерживает, иначе по размеру).
+        """
+        head = min(UPLOAD_BLOCK_SIZE, size)
+        part_size = max(1, -(-(size - head) // self.parallel_chunks))
+        parts = [(offset, min(part_size, size - offset)) for offset in range(head, size, part_size)]
+        self.logger.info(f"Начало загрузки {local_path} -> {remote_path} ({len(parts)} частей)")
+
+        # Первый блок загружаем обычным STOR: он создает (или обнуляет) удаленный файл.
+        # Остальные части пишутся только со смещением больше нуля,
+        # так как некоторые серверы (например, vsftpd) обнуляют файл при REST 0.
         with open(local_path, 'rb') as f:
-            self.ftp.storbinary(f'STOR {remote_path}', f)
+            self._store_file(remote_path, f, count=head)
+
+        # Только размер не выявит части, записанные со сдвигом или затертые нулями,
+        # поэтому при поддержке HASH/XCRC сверяем контрольную сумму всего файла.
+        # Локально она считается, пока части загружаются
+        hasher = None
+        if parts:
+            with ThreadPoolExecutor(max_workers=len(parts) + 1) as executor:
+                futures = [
+                    executor.submit(self._upload_part, local_path, remote_path, offset, count)
+                    for offset, count in parts
+                ]
+                digest_future = executor.submit(self._file_digest, local_path) if self._checksum else None
+
+                # Пока части загружаются через другие соединения, это простаивает:
+                # NOOP не дает серверу закрыть его до проверки результата
+                pending = set(futures)
+                if digest_future:
+                    pending.add(digest_future)
+                while pending:
+                    _, pending = wait(pending, timeout=KEEPALIVE_INTERVAL)
+                    if pending:
+                        self.ftp.voidcmd('NOOP')
+
+                for future in futures:
+                    future.result()
+                if digest_future:
+                    hasher = digest_future.result()
+        elif self._checksum:
+            hasher = self._file_digest(local_path)
+
+        if not self._verify_upload(remote_path, size, hasher):
+            return False
+
         self.logger.info(f"Успешная загрузка {local_path}")
         return True
 
+    def _file_digest(self, local_path):
+        """Считает контрольную сумму файла алгоритмом, выбранным для проверки загрузок."""
+        hasher = self._checksum[1]()
+        with open(local_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(UPLOAD_BLOCK_SIZE), b''):
+                hasher.update(chunk)
+        return hasher
+
+    def _upload_part(self, local_path, remote_path, offset, count):
+        """Загружает одну часть файла через отдельное соединение."""
+        part_client = self.clone()
+        if not part_client.connect():
+            raise ConnectionError(f"Не удалось открыть соединение для загрузки части {remote_path}")
+        try:
+            with open(local_path, 'rb') as f:
+                f.seek(offset)
+                part_client._store_file(remote_path, f, rest=offset, count=count)
+            self.logger.debug(f"Часть {remote_path} [{offset}:{offset + count}] загружена")
+        finally:
+            part_client.close()
+
     @retry(
         max_retries=3,
         initial_delay=1,
@@ -97,4 +503,74 @@ class FTPClient:
         """Удаляет файл на сервере."""
         self.logger.info(f"Удаление файла на сервере: {remote_path}")
         self.ftp.delete(remote_path)
-        self.logger.info(f"Успешное удаление {remote_path}")
\ No newline at end of file
+        self.logger.info(f"Успешное удаление {remote_path}")
+
+    def delete_files(self, remote_paths):
+        """
+        Удаляет несколько файлов на сервере.
+        Команды DELE отправляются пакетами: сначала все команды пакета, затем
+        читаются ответы, поэтому на пакет тратится одна задержка сети, а не по одной на файл.
+        Если сервер сбился при пакетной обработке, оставшиеся файлы удаляются
+        по одному через новое соединение.
+
+        Returns:
+            list: Пути успешно удаленных файлов.
+        """
+        deleted = []
+        remote_paths = list(remote_paths)
+        for start in range(0, len(remote_paths), DELETE_BATCH_SIZE):
+            batch = remote_paths[start:start + DELETE_BATCH_SIZE]
+            try:
+                for path in batch:
+                    self.ftp.putcmd(f'DELE {path}')
+                for path in batch:
+                    try:
+                        self.ftp.voidresp()
+                        deleted.append(path)
+                    except ftplib.error_perm as e:
+                        self.logger.error(f"Не удалось удалить файл на сервере {path}: {e}",
+                                          extra={"error_code": BackupErrorCodes.FTP_DELETE_FAILED})
+            except ftplib.all_errors as e:
+                self.logger.warning(f"Пакетное удаление прервано: {e}. Удаляю оставшиеся файлы по одному.")
+                return deleted + self._delete_files_one_by_one(remote_paths[start:], skip=deleted)
+
+        self.logger.info(f"Удалено файлов на сервере: {len(deleted)} из {len(remote_paths)}")
+        return deleted
+
+    def _delete_files_one_by_one(self, remote_paths, skip=()):
+        """
+        Переподключается и удаляет файлы последовательными командами DELE.
+        Часть файлов могла быть удалена прерванным пакетом без прочитанного ответа:
+        для них сервер вернет 550, поэтому такие файлы проверяются через SIZE,
+        а не удаляются повторно с задержками retry.
+        """
+        self._reset_connection()
+        if not self.connect():
+            return []
+
+        deleted = []
+        for path in remote_paths:
+            if path in skip:
+                continue
+            try:
+                self.ftp.delete(path)
+                deleted.append(path)
+            except ftplib.error_perm as e:
+                if str(e).startswith('550') and self._is_missing(path):
+                    deleted.append(path)
+                else:
+                    self.logger.error(f"Не удалось удалить файл на сервере {path}: {e}",
+                                      extra={"error_code": BackupErrorCodes.FTP_DELETE_FAILED})
+            except ftplib.all_errors as e:
+                self.logger.error(f"Не удалось удалить файл на сервере {path}: {e}",
+                                  extra={"error_code": BackupErrorCodes.FTP_DELETE_FAILED})
+                break
+        return deleted
+
+    def _is_missing(self, path):
+        """Проверяет, что файла на сервере нет (SIZE отвечает 550)."""
+        try:
+            self.ftp.size(path)
+            return False
+        except ftplib.error_perm as e:
+            return str(e).startswith('550')
@@ -1,14 +1,23 @@
 # logger.py
+import atexit
+import gzip
 import logging
 import os
+import queue
+import shutil
+import stat
 import sys
-from logging.handlers import RotatingFileHandler
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 
 try:
     import jsonlogger
 except ImportError:
     jsonlogger = None
 
+# Фоновые обработчики очередей логов: {имя логгера: QueueListener}
+_listeners = {}
+
 
 def _get_json_formatter():
     """Возвращает форматтер JSON, если библиотека доступна."""
@@ -21,14 +30,126 @@ def _get_json_formatter():
     return None
 
 
-def setup_logger(name, log_dir, level=logging.INFO):
+def _compress_log(source, dest, compresslevel):
+    """Сжимает ротированный лог и удаляет исходный файл."""
+    tmp_dest = dest + '.part'
+    with open(source, 'rb') as f_in, gzip.open(tmp_dest, 'wb', compresslevel=compresslevel) as f_out:
+        shutil.copyfileobj(f_in, f_out, length=1 << 20)
+    os.replace(tmp_dest, dest)
+    os.remove(source)
+
+
+class _GzipRotatingFileHandler(RotatingFileHandler):
+    """
+    RotatingFileHandler со сжатием архивных копий (backup.log.N.gz).
+
+    Лог ротируется мгновенным переименованием, а сжатие выполняется в фоновом
+    потоке, чтобы запись в лог не блокировалась на время работы gzip.
+    Размер лога обработчик считает сам: стандартный перед каждой записью
+    проверяет файл через stat() и seek()/tell(), здесь размер запрашивается
+    один раз при открытии файла.
+    """
+
+    def __init__(self, *args, compresslevel=1, **kwargs):
+        self.compresslevel = compresslevel
+        self._size = None
+        self._compress_thread = None
+        super().__init__(*args, **kwargs)
+        self._start_compression(self._compress_leftovers)
+
+    def _start_compression(self, target, *args):
+        self._compress_thread = threading.Thread(target=target, args=args, daemon=True)
+        self._compress_thread.start()
+
+    def _compress_leftovers(self):
+        """
+        Дожимает копии, оставшиеся несжатыми после прерванного запуска
+        (backup.log.N без .gz), и удаляет недописанные .gz.part.
+        Без этого такие копии не участвуют в ротации и не удаляются.
+        """
+        log_dir, prefix = os.path.split(self.baseFilename)
+        prefix += '.'
+        with os.scandir(log_dir) as entries:
+            names = {entry.name for entry in entries if entry.name.startswith(prefix)}
+
+        for name in names:
+            path = os.path.join(log_dir, name)
+            suffix = name[len(prefix):]
+            try:
+                if suffix.endswith('.gz.part'):
+                    os.remove(path)
+                elif suffix.isdigit():
+                    if name + '.gz' in names:
+                        # Сжатие успело завершиться, не удален только исходный файл
+                        os.remove(path)
+                    else:
+                        _compress_log(path, path + '.gz', self.compresslevel)
+            except OSError:
+                # Не мешаем работе логгера: попробуем при следующем запуске
+                pass
+
+    def _open(self):
+        self._size = None
+        return super()._open()
+
+    def rotation_filename(self, default_name):
+        return default_name + '.gz'
+
+    def _wait_compression(self):
+        if self._compress_thread is not None:
+            self._compress_thread.join()
+
+    def doRollover(self):
+        # Дожидаемся сжатия предыдущей копии, иначе оно пересечется с переименованием копий
+        self._wait_compression()
+        super().doRollover()
+
+    def rotate(self, source, dest):
+        rotated = dest[:-len('.gz')]
+        os.replace(source, rotated)
+        self._start_compression(_compress_log, rotated, dest, self.compresslevel)
+
+    def close(self):
+        # При завершении программы не оставляем копию несжатой
+        self._wait_compression()
+        super().close()
+
+    def shouldRollover(self, record):
+        if self.stream is None:  # delay был установлен
+            self.stream = self._open()
+        if self.maxBytes <= 0:
+            return False
+
+        if self._size is None:
+            st = os.fstat(self.stream.fileno())
+            if not stat.S_ISREG(st.st_mode):
+                # Как и в стандартном обработчике, ротируем только обычные файлы
+                self.maxBytes = 0
+                return False
+            self._size = st.st_size
+
+        # Считаем байты, а не символы: кириллица в UTF-8 занимает по два байта
+        msg = self.format(record) + self.terminator
+        record_size = len(msg.encode(self.encoding or 'utf-8'))
+        if self._size and self._size + record_size >= self.maxBytes:
+            # Размер нового файла будет заново получен через fstat() после ротации
+            return True
+        self._size += record_size
+        return False
+
+
+def setup_logger(name, log_dir, level=logging.INFO, gzip_level=1):
     """
     Настраивает логгер с двумя хендлерами.
+    Записи передаются хендлерам через очередь и пишутся в файл и консоль
+    фоновым потоком, поэтому вызовы логгера не ждут дискового ввода-вывода.
+    Для сброса очереди перед завершением вызовите shutdown_logger().
 
     Args:
         name (str): Имя логгера.
         log_dir (str): Путь к директории, где будут храниться лог-файлы.
         level: Уровень логирования (по умолчанию INFO).
+        gzip_level (int): Степень сжатия архивных копий лога (1 — быстрее всего, 9 — компактнее всего).
 
     Returns:
         logging.Logger: Настроенный объект логгера.
@@ -49,11 +170,12 @@ def setup_logger(name, log_dir, level=logging.INFO):
     log_file_path = os.path.join(log_dir, 'backup.log')
 
     # 2. Хендлер для записи в файл (JSON + Ротация)
-    file_handler = RotatingFileHandler(
+    file_handler = _GzipRotatingFileHandler(
         filename=log_file_path,
         maxBytes=5 * 1024 * 1024,  # 5 МБ
         backupCount=10,  # Хранить 10 старых файлов
-        encoding='utf-8'
+        encoding='utf-8',
+        compresslevel=gzip_level
     )
 
     json_formatter = _get_json_formatter()
@@ -69,8 +191,25 @@ def setup_logger(name, log_dir, level=logging.INFO):
     console_formatter = logging.Formatter('%(asctime)s - %(levelname)-8s - %(message)s')
     console_handler.setFormatter(console_formatter)
 
-    # Добавляем оба хендлера к логгеру
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+    # 4. Подключаем оба хендлера к логгеру через очередь
+    log_queue = queue.Queue(-1)
+    listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+    listener.start()
+    _listeners[name] = listener
+    atexit.register(shutdown_logger, name)
+
+    logger.addHandler(QueueHandler(log_queue))
+
+    return logger
 
-    return logger
\ No newline at end of file
+
+def shutdown_logger(name):
+    """
+    Дописывает накопленные в очереди записи, останавливает фоновый поток логгера
+    и закрывает его обработчики. Повторный вызов ничего не делает.
+    """
+    listener = _listeners.pop(name, None)
+    if listener:
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
\ No newline at end of file
@@ -18,6 +18,7 @@ from .ftp_client import FTPClient
 from .archive_handler import ArchiveHandler
 from .sync_manager import SyncManager
 from .cleanup_manager import CleanupManager
+from .logger import setup_logger, shutdown_logger
 
 
 def main():
@@ -45,8 +46,7 @@ def main():
         config = Config(args.config)
 
         # 4. Настройка логгера (JSON + Ротация + Консоль)
-        from .logger import setup_logger
-        logger = setup_logger('backup', config.log_dir)
+        logger = setup_logger('backup', config.log_dir, gzip_level=config.log_gzip_level)
 
         # 5. Обработка команды 'check'
         if args.command == 'check':
@@ -73,14 +73,17 @@ def main():
                 host=config.ftp_host,
                 user=config.ftp_user,
                 password=config.ftp_pass,
-                logger=logger
+                logger=logger,
+                parallel_chunks=config.parallel_chunks,
+                chunk_threshold=config.chunk_upload_threshold_mb * 1024 * 1024
             )
 
             archive_handler = ArchiveHandler(logger=logger)
             sync_manager = SyncManager(
                 ftp_client=ftp_client,
                 archive_handler=archive_handler,
-                logger=logger
+                logger=logger,
+                max_workers=config.parallel_uploads
             )
             cleanup_manager = CleanupManager(logger=logger)
 
@@ -105,7 +108,8 @@ def main():
             cleanup_manager.cleanup_remote(
                 ftp_client=ftp_client,
                 remote_dir=config.remote_backup_dir,
-                max_copies=config.max_remote_copies
+                max_copies=config.max_remote_copies,
+                remote_files=sync_manager.remote_files
             )
 
             ftp_client.close()
@@ -119,6 +123,8 @@ def main():
             extra={"event": "critical_error"}
         )
         sys.exit(1)
+    finally:
+        shutdown_logger('backup')
 
 
 if __name__ == '__main__':
@@ -1,49 +1,89 @@
 import os
 import logging
+import threading
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
 from .errors import BackupErrorCodes
 
 
 class SyncManager:
-    def __init__(self, ftp_client, archive_handler, logger=None):
+    def __init__(self, ftp_client, archive_handler, logger=None, max_workers=4):
         self.ftp_client = ftp_client
         self.archive_handler = archive_handler
         self.logger = logger or logging.getLogger(self.__class__.__name__)
+        self.max_workers = max_workers
 
-        # Кэш списка файлов на сервере
-        self._remote_files_cache = None
+        # Кэш файлов на сервере {имя: атрибуты MLSD}: запрашивается один раз за синхронизацию
+        # и дополняется по мере загрузки, чтобы очистка могла его переиспользовать
+        self.remote_files = None
+
+        # ftplib не потокобезопасен, поэтому каждый поток загрузки
+        # работает через собственное FTP-соединение
+        self._thread_local = threading.local()
+        self._worker_clients = []
+        self._worker_clients_lock = threading.Lock()
 
     def _get_remote_files(self, remote_dir):
         """
         Получает список файлов с сервера.
         Использует кэширование, чтобы избежать повторных запросов к серверу.
         """
-        if self._remote_files_cache is None:
+        if self.remote_files is None:
             self.logger.debug(f"Запрашиваю список файлов с FTP-сервера (директория: {remote_dir})")
             try:
-                self._remote_files_cache = set(self.ftp_client.list_files(remote_dir))
-                self.logger.debug(f"Кэшировано {len(self._remote_files_cache)} файлов")
+                self.remote_files = self.ftp_client.list_files_with_facts(remote_dir)
+                self.logger.debug(f"Кэшировано {len(self.remote_files)} файлов")
             except Exception as e:
                 self.logger.error(f"Не удалось получить список файлов для кэширования: {e}",
                                   extra={"error_code": BackupErrorCodes.FTP_LIST_FAILED})
                 # Если ошибка критическая, лучше прервать процесс
                 raise
-        return self._remote_files_cache
+        return self.remote_files
+
+    @staticmethod
+    def _is_uploaded(local_size, remote_facts):
+        """
+        Проверяет, что файл уже есть на сервере.
+        Если сервер сообщил размер (MLSD), файл другого размера считается
+        измененным или недогруженным и загружается заново.
+        """
+        if remote_facts is None:
+            return False
+        remote_size = remote_facts.get('size')
+        return remote_size is None or int(remote_size) == local_size
+
+    def _get_worker_client(self):
+        """
+        Возвращает FTP-клиент текущего потока.
+        При первом обращении из потока открывает для него отдельное соединение.
+        """
+        client = getattr(self._thread_local, 'ftp_client', None)
+        if client is None:
+            client = self.ftp_client.clone()
+            if not client.connect():
+                raise ConnectionError(f"Не удалось открыть соединение потока загрузки с {client.host}")
+            with self._worker_clients_lock:
+                self._worker_clients.append(client)
+            self._thread_local.ftp_client = client
+        return client
+
+    def _close_worker_clients(self):
+        """Закрывает соединения всех потоков загрузки."""
+        with self._worker_clients_lock:
+            clients, self._worker_clients = self._worker_clients, []
+        for client in clients:
+            client.close()
+        self._thread_local = threading.local()
 
     def _upload_task(self, local_dir, remote_dir, archive_name):
         """
-        Задача для потока: загрузить один файл, если его нет на сервере.
+        Задача для потока: загрузить один файл.
         """
         local_path = os.path.join(local_dir, archive_name)
         remote_path = os.path.join(remote_dir, archive_name)
 
-        # Проверяем наличие файла в кэше
-        if archive_name in self._get_remote_files(remote_dir):
-            self.logger.debug(f"Файл {archive_name} уже есть на сервере. Пропускаем.")
-            return {"file": archive_name, "status": "skipped", "reason": "exists"}
-
         try:
-            self.ftp_client.upload_file(local_path, remote_path)
+            self._get_worker_client().upload_file(local_path, remote_path)
             return {"file": archive_name, "status": "success"}
         except Exception as e:
             # Логируем ошибку и возвращаем информацию о сбое
@@ -59,8 +99,10 @@ class SyncManager:
         self.logger.info("Начало синхронизации архивов", extra={"event": "sync_start"})
 
         # Сбрасываем кэш перед новой операцией синхронизации
-        self._remote_files_cache = None
+        self.remote_files = None
 
+        # {имя: размер}: размер уже получен при сканировании директории и нужен
+        # и для сравнения с сервером, и для обновления кэша после загрузки
         local_archives = self.archive_handler.find_archives(local_dir)
 
         if not local_archives:
@@ -70,41 +112,58 @@ class SyncManager:
         self.logger.info(f"Найдено {len(local_archives)} архивов для проверки.",
                          extra={"file_count": len(local_archives)})
 
-        # Используем ThreadPoolExecutor для параллельной загрузки
-        # max_workers=5 означает, что одновременно будет загружаться до 5 файлов.
-        # Это число можно сделать настраиваемым через конфиг.
+        # Список файлов на сервере получаем заранее через основное соединение
+        # и сразу отбрасываем архивы, которые уже загружены
+        remote_files = self._get_remote_files(remote_dir)
+        pending = [
+            archive for archive in local_archives
+            if not self._is_uploaded(local_archives[archive], remote_files.get(archive))
+        ]
+        skipped_count = len(local_archives) - len(pending)
+        if skipped_count:
+            self.logger.debug(f"Уже есть на сервере и будут пропущены: {skipped_count} файлов",
+                              extra={"event": "file_processed", "status": "skipped"})
+
+        # Используем ThreadPoolExecutor для параллельной загрузки:
+        # одновременно загружается до max_workers файлов,
+        # каждый поток через собственное FTP-соединение.
         results = []
-        with ThreadPoolExecutor(max_workers=5) as executor:
-            future_to_file = {
-                executor.submit(self._upload_task, local_dir, remote_dir, archive): archive
-                for archive in local_archives
-            }
-
-            for future in as_completed(future_to_file):
-                file_name = future_to_file[future]
-                try:
-                    result = future.result()
-                    results.append(result)
-                    if result["status"] == "success":
-                        self.logger.info(f"Обработан файл: {file_name}",
-                                         extra={"event": "file_processed", "status": "success"})
-                    elif result["status"] == "skipped":
-                        self.logger.debug(f"Файл пропущен: {file_name}",
-                                          extra={"event": "file_processed", "status": "skipped"})
-                    else:
-                        self.logger.warning(f"Файл не загружен: {file_name}",
-                                            extra={"event": "file_processed", "status": "failed"})
-                except Exception as exc:
-                    # Это исключение из самой задачи _upload_task (например, ошибка при открытии файла)
-                    self.logger.error(f"Файл {file_name} сгенерировал исключение: {exc}", exc_info=True)
-                    results.append({"file": file_name, "status": "error", "error": str(exc)})
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                future_to_file = {
+                    executor.submit(self._upload_task, local_dir, remote_dir, archive): archive
+                    for archive in pending
+                }
+
+                for future in as_completed(future_to_file):
+                    file_name = future_to_file[future]
+                    try:
+                        result = future.result()
+                        results.append(result)
+                        if result["status"] == "success":
+                            # modify в формате MLSD (UTC): по нему очистка датирует архив без метки в имени
+                            self.remote_files[file_name] = {
+                                'size': str(local_archives[file_name]),
+                                'modify': datetime.now(timezone.utc).strftime('%Y%m%d%H%M%S'),
+                            }
+                            self.logger.info(f"Обработан файл: {file_name}",
+                                             extra={"event": "file_processed", "status": "success"})
+                        else:
+                            self.logger.warning(f"Файл не загружен: {file_name}",
+                                                extra={"event": "file_processed", "status": "failed"})
+                    except Exception as exc:
+                        # Это исключение из самой задачи _upload_task (например, ошибка при открытии файла)
+                        self.logger.error(f"Файл {file_name} сгенерировал исключение: {exc}", exc_info=True)
+                        results.append({"file": file_name, "status": "error", "error": str(exc)})
+        finally:
+            # Соединения потоков закрываем только после завершения всех задач
+            self._close_worker_clients()
 
         # Итоговый отчет
         success_count = sum(1 for r in results if r["status"] == "success")
-        skipped_count = sum(1 for r in results if r["status"] == "skipped")
         failed_count = sum(1 for r in results if r["status"] == "failed")
 
         self.logger.info(
             f"Синхронизация завершена. Успешно: {success_count}, Пропущено: {skipped_count}, Ошибок: {failed_count}",
             extra={"event": "sync_finish", "success": success_count, "skipped": skipped_count, "failed": failed_count}
-        )
\ No newline at end of file
+        )
@@ -4,6 +4,17 @@ import functools
 from random import uniform
 
 
+def _flatten_exceptions(exceptions):
+    """Раскрывает вложенные кортежи исключений (например, ftplib.all_errors): except их не принимает."""
+    flat = []
+    for exc in exceptions:
+        if isinstance(exc, tuple):
+            flat.extend(_flatten_exceptions(exc))
+        else:
+            flat.append(exc)
+    return tuple(flat)
+
+
 def retry(
         max_retries: int = 3,
         initial_delay: float = 1.0,
@@ -22,6 +33,8 @@ def retry(
     :param logger: Экземпляр логгера.
     """
 
+    exceptions = _flatten_exceptions(exceptions)
+
     def decorator(func):
         @functools.wraps(func)
         def wrapper(*args, **kwargs):